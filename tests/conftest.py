@@ -0,0 +1,15 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.fetch_imap_emails import FetchImapEmailsTool  # noqa: E402
+
+
+@pytest.fixture
+def tool() -> FetchImapEmailsTool:
+    # Only runtime.credentials is read, so no plugin session is needed.
+    return FetchImapEmailsTool(runtime=SimpleNamespace(credentials={}), session=None)
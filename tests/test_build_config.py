@@ -0,0 +1,71 @@
+from types import SimpleNamespace
+
+import pytest
+
+from tools.fetch_imap_emails import ImapConfig
+
+CREDENTIALS = {
+    "config_name": "work",
+    "email_account": "demo@example.com",
+    "email_password": "secret",
+    "imap_server": "imap.example.com",
+    "imap_port": "993",
+    "recent_count": "10",
+}
+
+
+@pytest.fixture
+def configured(tool):
+    tool.runtime = SimpleNamespace(credentials=dict(CREDENTIALS))
+    return tool
+
+
+def test_credentials_are_converted(configured):
+    assert configured._build_config({}) == ImapConfig(
+        config_name="work",
+        email_account="demo@example.com",
+        email_password="secret",
+        imap_server="imap.example.com",
+        imap_port=993,
+        recent_count=10,
+    )
+
+
+def test_parameters_override_credentials(configured):
+    config = configured._build_config({"imap_server": "imap.other.com", "recent_count": 3, "imap_port": ""})
+
+    assert (config.imap_server, config.imap_port, config.recent_count) == ("imap.other.com", 993, 3)
+
+
+def test_recent_count_defaults_to_five(configured):
+    configured.runtime.credentials["recent_count"] = None
+
+    assert configured._build_config({}).recent_count == 5
+
+
+def test_unhashable_values_are_validated(configured):
+    with pytest.raises(ValueError, match="imap_port must be a positive integer"):
+        configured._build_config({"imap_port": ["993"]})
+
+
+def test_password_change_takes_effect(configured):
+    configured._build_config({})
+
+    assert configured._build_config({"email_password": "changed"}).email_password == "changed"
+
+
+@pytest.mark.parametrize(
+    ("overrides", "message"),
+    [
+        ({"email_account": "not-an-address"}, "Invalid or missing email_account"),
+        ({"email_password": None}, "Missing email_password"),
+        ({"imap_server": None}, "Missing imap_server"),
+        ({"imap_port": "0"}, "imap_port must be a positive integer"),
+        ({"recent_count": "many"}, "recent_count must be a positive integer"),
+    ],
+)
+def test_invalid_values_are_rejected(tool, overrides, message):
+    tool.runtime = SimpleNamespace(credentials={**CREDENTIALS, **overrides})
+
+    with pytest.raises(ValueError, match=message):
+        tool._build_config({})
@@ -0,0 +1,97 @@
+import dataclasses
+import imaplib
+
+import pytest
+
+from tools import fetch_imap_emails
+from tools.fetch_imap_emails import ImapConfig
+
+CONFIG = ImapConfig(
+    config_name=None,
+    email_account="demo@example.com",
+    email_password="secret",
+    imap_server="imap.example.com",
+    imap_port=993,
+    recent_count=5,
+)
+
+
+class FakeConnection:
+    opened = []
+
+    def __init__(self, host, port):
+        self.noop_error = None
+        self.logged_out = False
+        FakeConnection.opened.append(self)
+
+    def login(self, account, password):
+        return "OK", [b"LOGIN completed"]
+
+    def noop(self):
+        if self.noop_error is not None:
+            raise self.noop_error
+        return "OK", [b"NOOP completed"]
+
+    def logout(self):
+        self.logged_out = True
+
+
+@pytest.fixture(autouse=True)
+def pool(monkeypatch):
+    pool = {}
+    FakeConnection.opened = []
+    monkeypatch.setattr(fetch_imap_emails, "_POOL", pool)
+    monkeypatch.setattr(fetch_imap_emails, "PipelinedIMAP4_SSL", FakeConnection)
+    return pool
+
+
+def test_released_connection_is_reused(tool):
+    mail = tool._acquire_connection(CONFIG)
+    tool._release_connection(CONFIG, mail)
+
+    assert tool._acquire_connection(CONFIG) is mail
+    assert FakeConnection.opened == [mail]
+
+
+def test_pool_key_does_not_hold_the_password(tool, pool):
+    tool._release_connection(CONFIG, tool._acquire_connection(CONFIG))
+
+    (key,) = pool
+    assert CONFIG.email_password not in key
+    other = dataclasses.replace(CONFIG, email_password="changed")
+    assert tool._pool_key(other) != key
+
+
+def test_idle_connection_is_dropped(tool, pool):
+    stale = FakeConnection("imap.example.com", 993)
+    last_used = fetch_imap_emails.time.monotonic() - fetch_imap_emails._POOL_IDLE_TIMEOUT
+    pool[tool._pool_key(CONFIG)] = [(stale, last_used)]
+
+    mail = tool._acquire_connection(CONFIG)
+
+    assert mail is not stale
+    assert stale.logged_out
+
+
+@pytest.mark.parametrize("error", [imaplib.IMAP4.abort("socket error: EOF"), OSError("reset")])
+def test_failed_noop_reconnects(tool, error):
+    broken = tool._acquire_connection(CONFIG)
+    tool._release_connection(CONFIG, broken)
+    broken.noop_error = error
+
+    mail = tool._acquire_connection(CONFIG)
+
+    assert mail is not broken
+    assert broken.logged_out
+    assert FakeConnection.opened == [broken, mail]
+
+
+def test_connections_beyond_the_limit_are_evicted(tool, pool):
+    connections = [tool._acquire_connection(CONFIG) for _ in range(fetch_imap_emails._FETCH_CONNECTIONS + 1)]
+    for mail in connections:
+        tool._release_connection(CONFIG, mail)
+
+    pooled = [mail for mail, _ in pool[tool._pool_key(CONFIG)]]
+    assert pooled == connections[1:]
+    assert connections[0].logged_out
+    assert not any(mail.logged_out for mail in pooled)
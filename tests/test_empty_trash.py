@@ -0,0 +1,69 @@
+import pytest
+
+from tools import fetch_imap_emails
+from tools.fetch_imap_emails import ImapConfig
+
+GMAIL = ImapConfig(
+    config_name=None,
+    email_account="demo@gmail.com",
+    email_password="secret",
+    imap_server="imap.gmail.com",
+    imap_port=993,
+    recent_count=5,
+)
+
+
+class FakeMail:
+    def __init__(self, mailboxes):
+        self.mailboxes = mailboxes
+        self.commands = []
+
+    def select(self, mailbox):
+        self.commands.append(("SELECT", mailbox))
+        return ("OK" if mailbox in self.mailboxes else "NO"), [b""]
+
+    def list(self):
+        self.commands.append(("LIST",))
+        return "OK", [f'(\\HasNoChildren) "/" {name}'.encode() for name in self.mailboxes]
+
+    def store(self, message_set, command, flags):
+        self.commands.append(("STORE", message_set))
+
+    def expunge(self):
+        self.commands.append(("EXPUNGE",))
+
+
+@pytest.fixture(autouse=True)
+def trash_cache(monkeypatch):
+    cache = {}
+    monkeypatch.setattr(fetch_imap_emails, "_TRASH_CACHE", cache)
+    return cache
+
+
+def test_known_host_skips_list(tool):
+    mail = FakeMail(['"[Gmail]/Trash"'])
+
+    assert tool._empty_trash(mail, GMAIL)
+    assert mail.commands == [("SELECT", '"[Gmail]/Trash"'), ("STORE", "1:*"), ("EXPUNGE",)]
+
+
+def test_wrong_host_default_is_not_retried(tool):
+    mail = FakeMail(['"[Gmail]/Papierkorb"'])
+
+    assert not tool._empty_trash(mail, GMAIL)
+    assert mail.commands == [("SELECT", '"[Gmail]/Trash"'), ("LIST",)]
+    # The caller now pipelines LIST with its FETCHes and passes the result in.
+    assert tool._known_trash_folder(GMAIL) is None
+    mailboxes = mail.list()[1]
+    mail.commands.clear()
+    assert not tool._empty_trash(mail, GMAIL, mailboxes)
+    assert mail.commands == []
+
+
+def test_stale_cache_entry_is_replaced_from_list(tool, trash_cache):
+    trash_cache[("imap.gmail.com", "demo@gmail.com")] = "Old Trash"
+    mail = FakeMail(['"Deleted Items"'])
+
+    assert tool._empty_trash(mail, GMAIL)
+    assert trash_cache[("imap.gmail.com", "demo@gmail.com")] == "Deleted Items"
+    assert tool._known_trash_folder(GMAIL) == "Deleted Items"
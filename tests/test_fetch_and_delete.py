@@ -0,0 +1,130 @@
+import imaplib
+
+import pytest
+
+from tools import fetch_imap_emails
+from tools.fetch_imap_emails import ImapConfig
+
+CONFIG = ImapConfig(
+    config_name=None,
+    email_account="demo@example.com",
+    email_password="secret",
+    imap_server="imap.example.com",
+    imap_port=993,
+    recent_count=2,
+)
+
+
+class FakeMail:
+    def __init__(self, exists):
+        self.exists = exists
+        self.commands = []
+        self.store_error = None
+        self.logged_out = False
+
+    def select(self, mailbox):
+        return "OK", self.exists
+
+    def fetch(self, message_set, query):
+        self.commands.append(("FETCH", message_set, query))
+        low, high = (int(number) for number in message_set.split(":"))
+        return "OK", [f"{number} (UID {number + 100})".encode() for number in range(low, high + 1)]
+
+    def uid(self, command, *args):
+        self.commands.append(("UID", command) + args)
+        if command == "STORE" and self.store_error is not None:
+            raise self.store_error
+        return "OK", [None]
+
+    def expunge(self):
+        self.commands.append(("EXPUNGE",))
+        return "OK", [None]
+
+    def logout(self):
+        self.logged_out = True
+
+
+def run(tool, monkeypatch, mail):
+    fetched = []
+    monkeypatch.setattr(tool, "_acquire_connection", lambda config: mail)
+    monkeypatch.setattr(tool, "_release_connection", lambda config, mail: None)
+    monkeypatch.setattr(tool, "_known_trash_folder", lambda config: "Trash")
+    monkeypatch.setattr(tool, "_empty_trash", lambda mail, config, mailboxes: True)
+    monkeypatch.setattr(
+        tool, "_iter_messages", lambda mail, config, target_ids: iter(fetched.extend(target_ids) or [])
+    )
+    stream = tool._fetch_and_delete_emails(CONFIG)
+    try:
+        while True:
+            next(stream)
+    except StopIteration as stop:
+        return stop.value, fetched
+
+
+def test_newest_messages_are_read_from_the_last_exists(tool, monkeypatch):
+    # A message arrived while SELECT was running, so the server sent EXISTS twice.
+    mail = FakeMail([b"10", b"12"])
+
+    result, fetched = run(tool, monkeypatch, mail)
+
+    assert result == (2, True)
+    assert mail.commands[0] == ("FETCH", "11:12", "(UID)")
+    assert fetched == [b"112", b"111"]
+    assert mail.commands[1:] == [("UID", "STORE", "112,111", "+FLAGS", "\\Deleted"), ("EXPUNGE",)]
+
+
+def test_empty_mailbox_fetches_nothing(tool, monkeypatch):
+    mail = FakeMail([b"0"])
+
+    assert run(tool, monkeypatch, mail) == ((0, True), [])
+    assert mail.commands == []
+
+
+@pytest.fixture
+def pooled_run(tool, monkeypatch):
+    pool = {}
+    monkeypatch.setattr(fetch_imap_emails, "_POOL", pool)
+    monkeypatch.setattr(tool, "_known_trash_folder", lambda config: "Trash")
+    monkeypatch.setattr(tool, "_empty_trash", lambda mail, config, mailboxes: True)
+    monkeypatch.setattr(
+        tool, "_iter_messages", lambda mail, config, target_ids: (b"\r\nbody" for _ in target_ids)
+    )
+
+    def start(mail):
+        monkeypatch.setattr(tool, "_acquire_connection", lambda config: mail)
+        return tool._fetch_and_delete_emails(CONFIG)
+
+    return start, pool
+
+
+def test_connection_is_pooled_after_success(pooled_run):
+    start, pool = pooled_run
+    mail = FakeMail([b"2"])
+
+    assert list(start(mail)) == [{"subject": "", "from": "", "date": None, "body": "body"}] * 2
+    assert [pooled for pooled, _ in pool.popitem()[1]] == [mail]
+    assert not mail.logged_out
+
+
+def test_connection_is_closed_after_an_error(pooled_run):
+    start, pool = pooled_run
+    mail = FakeMail([b"2"])
+    mail.store_error = imaplib.IMAP4.abort("socket error: EOF")
+
+    with pytest.raises(imaplib.IMAP4.abort):
+        list(start(mail))
+    assert mail.logged_out
+    assert pool == {}
+
+
+def test_connection_is_closed_when_the_caller_stops_early(pooled_run):
+    start, pool = pooled_run
+    mail = FakeMail([b"2"])
+    stream = start(mail)
+
+    next(stream)
+    stream.close()
+
+    assert mail.logged_out
+    assert pool == {}
+    assert not any(command[:2] == ("UID", "STORE") for command in mail.commands)
@@ -0,0 +1,112 @@
+import imaplib
+
+import pytest
+
+from tools import fetch_imap_emails
+from tools.fetch_imap_emails import ImapConfig
+
+CONFIG = ImapConfig(
+    config_name=None,
+    email_account="demo@example.com",
+    email_password="secret",
+    imap_server="imap.example.com",
+    imap_port=993,
+    recent_count=60,
+)
+
+
+class FakeSession:
+    def __init__(self, select_status="OK"):
+        self.select_status = select_status
+        self.logged_out = False
+
+    def select(self, mailbox, readonly=False):
+        return self.select_status, [b"60"]
+
+    def logout(self):
+        self.logged_out = True
+
+
+@pytest.fixture
+def released(tool, monkeypatch):
+    released = []
+    monkeypatch.setattr(tool, "_release_connection", lambda config, mail: released.append(mail))
+    return released
+
+
+def test_extra_session_falls_back_when_examine_fails(tool, monkeypatch, released):
+    session = FakeSession(select_status="NO")
+    monkeypatch.setattr(tool, "_acquire_connection", lambda config: session)
+    monkeypatch.setattr(tool, "_fetch_messages", pytest.fail)
+
+    assert tool._fetch_on_extra_connection(CONFIG, [b"1"]) is None
+    assert session.logged_out
+    assert released == []
+
+
+@pytest.mark.parametrize("error", [imaplib.IMAP4.error("command FETCH illegal in state AUTH"), OSError("reset")])
+def test_extra_session_falls_back_when_fetch_fails(tool, monkeypatch, released, error):
+    session = FakeSession()
+    monkeypatch.setattr(tool, "_acquire_connection", lambda config: session)
+
+    def fail(mail, batch):
+        raise error
+
+    monkeypatch.setattr(tool, "_fetch_messages", fail)
+
+    assert tool._fetch_on_extra_connection(CONFIG, [b"1"]) is None
+    assert session.logged_out
+    assert released == []
+
+
+def test_failed_extra_batch_is_fetched_on_main_connection(tool, monkeypatch):
+    main = object()
+    target_ids = [str(uid).encode() for uid in range(60, 0, -1)]
+    fetched_on_main = []
+    monkeypatch.setattr(tool, "_fetch_on_extra_connection", lambda config, batch: None)
+
+    def fetch(mail, batch):
+        fetched_on_main.append(batch)
+        return {uid: b"raw " + uid for uid in batch}
+
+    monkeypatch.setattr(tool, "_fetch_messages", fetch)
+
+    raws = list(tool._iter_messages(main, CONFIG, target_ids))
+
+    assert raws == [b"raw " + uid for uid in target_ids]
+    assert fetched_on_main == [target_ids[:25], target_ids[25:50], target_ids[50:]]
+
+
+def test_batches_are_yielded_in_order_across_sessions(tool, monkeypatch):
+    target_ids = [str(uid).encode() for uid in range(60, 0, -1)]
+    sessions = []
+
+    def fetch_extra(config, batch):
+        sessions.append(batch)
+        return {uid: b"extra " + uid for uid in reversed(batch)}
+
+    monkeypatch.setattr(tool, "_fetch_on_extra_connection", fetch_extra)
+    monkeypatch.setattr(tool, "_fetch_messages", lambda mail, batch: {uid: b"main " + uid for uid in batch})
+
+    raws = list(tool._iter_messages(object(), CONFIG, target_ids))
+
+    assert raws == [b"main " + uid for uid in target_ids[:25]] + [b"extra " + uid for uid in target_ids[25:]]
+    assert sorted(sessions) == sorted([target_ids[25:50], target_ids[50:]])
+
+
+def test_first_batch_is_yielded_before_the_rest_is_fetched(tool, monkeypatch):
+    monkeypatch.setattr(fetch_imap_emails, "_FETCH_CONNECTIONS", 1)
+    target_ids = [str(uid).encode() for uid in range(60, 0, -1)]
+    fetched = []
+
+    def fetch(mail, batch):
+        fetched.append(batch)
+        return {uid: uid for uid in batch}
+
+    monkeypatch.setattr(tool, "_fetch_messages", fetch)
+    stream = tool._iter_messages(object(), CONFIG, target_ids)
+
+    assert next(stream) == b"60"
+    assert fetched == [target_ids[:25]]
+    assert len(list(stream)) == 59
+    assert len(fetched) == 3
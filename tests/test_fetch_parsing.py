@@ -0,0 +1,183 @@
+import email
+
+import pytest
+
+# Response shapes as imaplib returns them: one (text, literal) tuple per literal, then the
+# closing text of the FETCH response.
+NESTED_STRUCTURE = (
+    b'4 (UID 746 BODYSTRUCTURE ((("text" "plain" ("charset" "utf-8") NIL NIL "base64" 123 5 NIL NIL NIL NIL)'
+    b'("text" "html" ("charset" "us-ascii") NIL NIL "7bit" 114 4 NIL NIL NIL NIL) "alternative" '
+    b'("boundary" "===============6683977395837634993==") NIL NIL NIL)'
+    b'("application" "pdf" NIL NIL NIL "base64" 273828 NIL "attachment; filename=\\"big.pdf\\"" NIL NIL) '
+    b'"mixed" ("boundary" "===============0061400649367698166==") NIL NIL NIL))'
+)
+HEADER = (
+    b'Content-Type: multipart/mixed; boundary="===============0061400649367698166=="\r\n'
+    b"MIME-Version: 1.0\r\n"
+    b"Subject: nested\r\n"
+    b"\r\n"
+)
+PART_MIME = b'Content-Type: text/plain; charset="utf-8"\r\nContent-Transfer-Encoding: base64\r\n\r\n'
+PART_BODY = b"bmVzdGVkIHBsYWluIMO8\r\n"
+SECTION_DATA = [
+    (b"4 (UID 746 BODY[HEADER] {%d}" % len(HEADER), HEADER),
+    (b" BODY[1.1.MIME] {%d}" % len(PART_MIME), PART_MIME),
+    (b" BODY[1.1] {%d}" % len(PART_BODY), PART_BODY),
+    b")",
+]
+
+
+def structure_of(tool, response):
+    return tool._parse_fetch_data(response)[b"746"][b"BODYSTRUCTURE"]
+
+
+def test_multiple_literals_per_message(tool):
+    items = tool._parse_fetch_data(SECTION_DATA)
+
+    assert list(items) == [b"746"]
+    assert items[b"746"] == {
+        b"UID": b"746",
+        b"BODY[HEADER]": HEADER,
+        b"BODY[1.1.MIME]": PART_MIME,
+        b"BODY[1.1]": PART_BODY,
+    }
+
+
+def test_responses_for_several_messages_are_split(tool):
+    data = [
+        (b'1 (UID 743 BODY[] {5}', b"first"),
+        b")",
+        (b'2 (UID 744 BODY[] {6}', b"second"),
+        b")",
+    ]
+
+    items = tool._parse_fetch_data(data)
+
+    assert {uid: entry[b"BODY[]"] for uid, entry in items.items()} == {b"743": b"first", b"744": b"second"}
+
+
+def test_literal_inside_bodystructure(tool):
+    data = [
+        (b'1 (UID 746 BODYSTRUCTURE (("text" "plain" ("name" {9}', b'a "b" (c)'),
+        b') NIL NIL "7bit" 5 1 NIL NIL NIL NIL) "mixed" ("boundary" "x") NIL NIL NIL))',
+    ]
+
+    structure = structure_of(tool, data)
+
+    assert structure[0][:3] == [b"text", b"plain", [b"name", b'a "b" (c)']]
+    assert structure[1] == b"mixed"
+    assert tool._find_text_section(structure) == "1"
+
+
+def test_quoted_strings_and_nil(tool):
+    parsed = tool._parse_imap_data([b'(NIL "a \\"quoted\\" (paren)" BODY[1.MIME] atom)'])
+
+    assert parsed == [[None, b'a "quoted" (paren)', b"BODY[1.MIME]", b"atom"]]
+
+
+def test_nested_section(tool):
+    assert tool._find_text_section(structure_of(tool, [NESTED_STRUCTURE])) == "1.1"
+
+
+@pytest.mark.parametrize(
+    ("structure", "section"),
+    [
+        (b'("text" "html" ("charset" "utf-8") NIL NIL "base64" 154 7 NIL NIL NIL NIL)', "TEXT"),
+        (
+            b'(("text" "html" NIL NIL NIL "7bit" 10 1 NIL NIL NIL NIL)'
+            b'("application" "pdf" NIL NIL NIL "base64" 100 NIL NIL NIL NIL) "mixed" NIL NIL NIL NIL)',
+            "1",
+        ),
+        (
+            b'(("text" "html" NIL NIL NIL "7bit" 10 1 NIL NIL NIL NIL)'
+            b'("text" "plain" NIL NIL NIL "7bit" 10 1 NIL NIL NIL NIL) "alternative" NIL NIL NIL NIL)',
+            "2",
+        ),
+        (
+            b'(("text" "plain" NIL NIL NIL "7bit" 10 1 NIL ("attachment" ("filename" "a.txt")) NIL NIL)'
+            b'("text" "html" NIL NIL NIL "7bit" 10 1 NIL NIL NIL NIL) "mixed" NIL NIL NIL NIL)',
+            "2",
+        ),
+        (
+            b'(("application" "octet-stream" NIL NIL NIL "base64" 292 NIL NIL NIL NIL) '
+            b'"mixed" ("boundary" "x") NIL NIL NIL)',
+            "HEADER",
+        ),
+        (
+            b'(("message" "rfc822" NIL NIL NIL "7bit" 10 NIL NIL NIL NIL) "mixed" NIL NIL NIL NIL)',
+            None,
+        ),
+    ],
+    ids=["single-html", "html-only", "plain-after-html", "plain-attachment", "no-text", "message-rfc822"],
+)
+def test_find_text_section(tool, structure, section):
+    parsed = structure_of(tool, [b"1 (UID 746 BODYSTRUCTURE " + structure + b")"])
+
+    assert tool._find_text_section(parsed) == section
+
+
+def test_missing_bodystructure_falls_back(tool):
+    assert tool._find_text_section(None) is None
+
+
+def test_assemble_nested_section(tool):
+    raw = tool._assemble_message(tool._parse_fetch_data(SECTION_DATA)[b"746"], "1.1")
+
+    msg = email.message_from_bytes(raw)
+    assert msg["Subject"] == "nested"
+    assert msg.get_content_type() == "text/plain"
+    assert tool._parse_email(raw)["body"] == "nested plain ü"
+
+
+def test_assemble_without_text_part(tool):
+    raw = tool._assemble_message({b"BODY[HEADER]": HEADER}, "HEADER")
+
+    assert raw == b"MIME-Version: 1.0\r\nSubject: nested\r\n\r\n"
+    assert tool._parse_email(raw) == {"subject": "nested", "from": "", "date": None, "body": ""}
+
+
+def test_assemble_with_missing_part(tool):
+    assert tool._assemble_message({b"BODY[HEADER]": HEADER, b"BODY[1.1]": PART_BODY}, "1.1") is None
+
+
+def test_unsolicited_fetch_without_uid(tool):
+    data = SECTION_DATA + [b"5 (FLAGS (\\Seen))"]
+
+    items = tool._parse_fetch_data(data)
+
+    assert items[b"5"] == {b"FLAGS": [b"\\Seen"]}
+    assert b"FLAGS" not in items[b"746"]
+
+
+class FakeMail:
+    def __init__(self, structure_data, section_data):
+        self.structure_data = structure_data
+        self.section_data = section_data
+        self.queries = []
+
+    def uid(self, command, message_set, query):
+        self.queries.append((message_set, query))
+        return "OK", self.structure_data if query == "(BODYSTRUCTURE)" else [None]
+
+    def send_command(self, name, *args):
+        self.queries.append(args[1:])
+        return b"A1"
+
+    def read_responses(self, name, *tags):
+        return "OK", self.section_data
+
+
+def test_fetch_messages_ignores_unsolicited_responses(tool):
+    mail = FakeMail(
+        [b"3 (FLAGS (\\Seen))", NESTED_STRUCTURE],
+        [b"3 (FLAGS (\\Seen))"] + SECTION_DATA,
+    )
+
+    raw_by_id = tool._fetch_messages(mail, [b"746"])
+
+    assert list(raw_by_id) == [b"746"]
+    assert mail.queries == [
+        ("746", "(BODYSTRUCTURE)"),
+        ("746", "(BODY.PEEK[HEADER] BODY.PEEK[1.1.MIME] BODY.PEEK[1.1])"),
+    ]
+    assert tool._parse_email(raw_by_id[b"746"])["body"] == "nested plain ü"
@@ -0,0 +1,87 @@
+import imaplib
+from types import SimpleNamespace
+
+import pytest
+
+CREDENTIALS = {
+    "config_name": "work",
+    "email_account": "demo@example.com",
+    "email_password": "secret",
+    "imap_server": "imap.example.com",
+    "imap_port": "993",
+    "recent_count": "2",
+}
+
+
+class FakeMail:
+    def __init__(self, store_error=None):
+        self.store_error = store_error
+        self.logged_out = False
+
+    def select(self, mailbox):
+        return "OK", [b"2"]
+
+    def fetch(self, message_set, query):
+        return "OK", [b"1 (UID 11)", b"2 (UID 12)"]
+
+    def uid(self, command, *args):
+        if command == "STORE" and self.store_error is not None:
+            raise self.store_error
+        return "OK", [None]
+
+    def expunge(self):
+        return "OK", [None]
+
+    def logout(self):
+        self.logged_out = True
+
+
+@pytest.fixture
+def invoke(tool, monkeypatch):
+    tool.runtime = SimpleNamespace(credentials=dict(CREDENTIALS))
+    monkeypatch.setattr(tool, "_release_connection", lambda config, mail: None)
+    monkeypatch.setattr(tool, "_known_trash_folder", lambda config: "Trash")
+    monkeypatch.setattr(tool, "_empty_trash", lambda mail, config, mailboxes: True)
+    monkeypatch.setattr(
+        tool,
+        "_iter_messages",
+        lambda mail, config, target_ids: (b"Subject: uid " + uid + b"\r\n\r\nbody" for uid in target_ids),
+    )
+
+    def invoke(mail):
+        monkeypatch.setattr(tool, "_acquire_connection", lambda config: mail)
+        return [message.message.json_object for message in tool._invoke({})]
+
+    return invoke
+
+
+def test_one_message_per_email_then_the_summary(invoke):
+    assert invoke(FakeMail()) == [
+        {"email": {"subject": "uid 12", "from": "", "date": None, "body": "body"}},
+        {"email": {"subject": "uid 11", "from": "", "date": None, "body": "body"}},
+        {
+            "config_name": "work",
+            "email_account": "demo@example.com",
+            "imap_server": "imap.example.com",
+            "imap_port": 993,
+            "recent_count": 2,
+            "deleted_count": 2,
+            "trash_cleared": True,
+        },
+    ]
+
+
+def test_error_follows_partial_output_when_store_fails(invoke):
+    mail = FakeMail(store_error=imaplib.IMAP4.abort("socket error: EOF"))
+
+    messages = invoke(mail)
+
+    assert [message["email"]["subject"] for message in messages[:2]] == ["uid 12", "uid 11"]
+    assert messages[2:] == [{"error": "socket error: EOF"}]
+    assert mail.logged_out
+
+
+def test_invalid_config_yields_only_an_error(invoke, tool):
+    tool.runtime.credentials["email_account"] = "nobody"
+
+    assert invoke(FakeMail()) == [{"error": "Invalid or missing email_account"}]
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+
+def test_raw_utf8_display_name_is_json_safe(tool):
+    raw = "From: 张三 <z@x.cn>\r\nSubject: 你好\r\n\r\nbody\r\n".encode()
+
+    parsed = tool._parse_email(raw)
+
+    assert parsed["from"] == "张三 <z@x.cn>"
+    assert parsed["subject"] == "你好"
+    json.dumps(parsed, ensure_ascii=False).encode()
+
+
+def test_encoded_words_are_decoded(tool):
+    raw = b"Subject: =?utf-8?b?5L2g5aW9?= hi\r\nFrom: =?utf-8?q?Jos=C3=A9?= <j@x.com>\r\n\r\nbody\r\n"
+
+    parsed = tool._parse_email(raw)
+
+    assert parsed["subject"] == "你好 hi"
+    assert parsed["from"] == "José <j@x.com>"
+
+
+def test_surrogate_escaped_header_is_replaced(tool):
+    value = "\udce5\udcbc\udca0 <z@x.cn>"
+
+    assert tool._decode_header_value(value) == "张 <z@x.cn>"
+    assert tool._decode_header_value("\udcff x") == "� x"
+
+
+def test_malformed_from_is_kept_verbatim(tool):
+    parsed = tool._parse_email(b"From: bad<<@@>>\r\n\r\nx")
+
+    assert parsed["from"] == "bad<<@@>>"
+
+
+def test_date_is_returned_unchanged(tool):
+    parsed = tool._parse_email(b"Date: Mon, 1 Jan 2024 00:00:00 +0000 (UTC)\r\n\r\nx")
+
+    assert parsed["date"] == "Mon, 1 Jan 2024 00:00:00 +0000 (UTC)"
+
+
+def test_missing_headers(tool):
+    assert tool._parse_email(b"\r\nbody") == {"subject": "", "from": "", "date": None, "body": "body"}
+
+
+def test_cp949_body_keeps_extended_hangul(tool):
+    raw = b"Content-Type: text/plain; charset=cp949\r\n\r\n" + "똠방각하".encode("cp949")
+
+    assert tool._parse_email(raw)["body"] == "똠방각하"
+
+
+def test_charset_aliases_resolve_through_email_charset(tool):
+    assert tool._lookup_codec("ks_c_5601-1987").name == "euc_kr"
+    assert tool._lookup_codec("gb2312").name == "gb2312"
+
+
+@pytest.mark.parametrize("charset", ["x-unknown", "base64", "zlib", "unknown-8bit"])
+def test_unusable_charset_falls_back_to_utf8(tool, charset):
+    raw = f"Content-Type: text/plain; charset={charset}\r\n\r\nplain ü".encode()
+
+    assert tool._parse_email(raw)["body"] == "plain ü"
+
+
+def test_codec_cache_is_bounded(tool):
+    assert tool._lookup_codec.cache_info().maxsize is not None
@@ -0,0 +1,135 @@
+import socket
+import threading
+
+import pytest
+
+from tools.fetch_imap_emails import PipelinedIMAP4_SSL
+
+
+class ScriptedServer(threading.Thread):
+    """Answers each command line from a script; commands in ``deferred`` are answered only
+    once the next command has arrived, which deadlocks a client that is not pipelining."""
+
+    def __init__(self, sock, script, deferred=()):
+        super().__init__(daemon=True)
+        self.sock = sock
+        self.script = script
+        self.deferred = set(deferred)
+        self.received = []
+
+    def run(self):
+        reader = self.sock.makefile("rb")
+        self.sock.sendall(b"* OK IMAP4rev1 ready\r\n")
+        held = []
+        for line in reader:
+            tag, command = line.rstrip(b"\r\n").decode().split(" ", 1)
+            self.received.append(command)
+            name = " ".join(command.split(" ", 2)[:2]) if command.startswith("UID ") else command.split(" ")[0]
+            untagged, status = self.script.get((name, len(self.received)), self.script.get(name, ([], "OK")))
+            reply = b"".join(f"* {response}\r\n".encode() for response in untagged)
+            reply += f"{tag} {status} {name} completed\r\n".encode()
+            if name in self.deferred:
+                held.append(reply)
+                continue
+            self.sock.sendall(b"".join(held) + reply)
+            held = []
+
+
+class SocketPairIMAP(PipelinedIMAP4_SSL):
+    def __init__(self, sock):
+        self._test_sock = sock
+        super().__init__("localhost", 0)
+
+    def _create_socket(self, timeout):
+        return self._test_sock
+
+
+@pytest.fixture
+def connect():
+    sockets = []
+
+    def connect(script, deferred=()):
+        client, server_sock = socket.socketpair()
+        client.settimeout(5)
+        sockets.extend((client, server_sock))
+        server = ScriptedServer(server_sock, {"CAPABILITY": (["CAPABILITY IMAP4rev1"], "OK"), **script}, deferred)
+        server.start()
+        mail = SocketPairIMAP(client)
+        mail.login("demo@example.com", "secret")
+        mail.select("INBOX")
+        return mail, server
+
+    yield connect
+    for sock in sockets:
+        sock.close()
+
+
+def test_list_is_read_after_the_commands_sent_behind_it(connect):
+    mail, server = connect(
+        {
+            "SELECT": (["2 EXISTS"], "OK"),
+            "LIST": (['LIST (\\HasNoChildren) "/" INBOX', 'LIST (\\HasNoChildren) "/" Trash'], "OK"),
+            "UID FETCH": (["2 FETCH (UID 7)"], "OK"),
+        },
+        deferred={"LIST"},
+    )
+
+    list_tag = mail.send_command("LIST", '""', "*")
+    assert mail.uid("FETCH", "7", "(UID)") == ("OK", [b"2 (UID 7)"])
+    mail.uid("STORE", "7", "+FLAGS", "\\Deleted")
+    mail.expunge()
+
+    assert mail.read_responses("LIST", list_tag) == (
+        "OK",
+        [b'(\\HasNoChildren) "/" INBOX', b'(\\HasNoChildren) "/" Trash'],
+    )
+    assert [command.split(" ")[0:2] for command in server.received[3:]] == [
+        ["LIST", '""'],
+        ["UID", "FETCH"],
+        ["UID", "STORE"],
+        ["EXPUNGE"],
+    ]
+
+
+def test_pipelined_fetches_share_one_result(connect):
+    mail, server = connect(
+        {
+            "SELECT": (["2 EXISTS"], "OK"),
+            ("UID FETCH", 4): (["1 FETCH (UID 6 BODY[1] {5}\r\nfirst)"], "OK"),
+            ("UID FETCH", 5): (["2 FETCH (UID 7 BODY[TEXT] {6}\r\nsecond)"], "OK"),
+        },
+        deferred={"UID FETCH"},
+    )
+
+    tags = [
+        mail.send_command("UID", "FETCH", "6", "(BODY.PEEK[1])"),
+        mail.send_command("UID", "FETCH", "7", "(BODY.PEEK[TEXT])"),
+    ]
+    server.deferred.clear()
+    mail.noop()
+
+    assert mail.read_responses("FETCH", *tags) == (
+        "OK",
+        [(b"1 (UID 6 BODY[1] {5}", b"first"), b")", (b"2 (UID 7 BODY[TEXT] {6}", b"second"), b")"],
+    )
+
+
+def test_failed_fetch_does_not_leak_into_the_next_result(connect):
+    mail, server = connect(
+        {
+            "SELECT": (["2 EXISTS"], "OK"),
+            ("UID FETCH", 4): ([], "NO"),
+            ("UID FETCH", 5): (["2 FETCH (UID 7 BODY[TEXT] {6}\r\nsecond)"], "OK"),
+            ("UID FETCH", 6): (["1 FETCH (UID 6 BODY[] {4}\r\nfull)"], "OK"),
+        },
+    )
+
+    tags = [
+        mail.send_command("UID", "FETCH", "6", "(BODY.PEEK[1])"),
+        mail.send_command("UID", "FETCH", "7", "(BODY.PEEK[TEXT])"),
+    ]
+    typ, data = mail.read_responses("FETCH", *tags)
+
+    assert typ == "NO"
+    assert data == [(b"2 (UID 7 BODY[TEXT] {6}", b"second"), b")"]
+    assert mail.uid("FETCH", "6", "(BODY.PEEK[])") == ("OK", [(b"1 (UID 6 BODY[] {4}", b"full"), b")"])
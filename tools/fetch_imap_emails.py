@@ -1,15 +1,25 @@
 from __future__ import annotations
 
-from collections.abc import Generator
-from dataclasses import dataclass
+from collections.abc import Generator, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, fields
 from typing import Any, Iterable
 
 from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 
+import codecs
 import email
+import email.charset
+import email.errors
+import functools
+import hashlib
 import imaplib
-from email.header import decode_header, make_header
+import re
+import threading
+import time
+from email.header import Header, decode_header
+from email.parser import BytesParser
 
 
 @dataclass(frozen=True)
@@ -22,6 +32,28 @@ class ImapConfig:
     recent_count: int
 
 
+_CONFIG_FIELDS = tuple(field.name for field in fields(ImapConfig))
+
+
+class PipelinedIMAP4_SSL(imaplib.IMAP4_SSL):
+    """IMAP4_SSL that can send several commands before reading their responses."""
+
+    def send_command(self, name: str, *args: str) -> bytes:
+        return self._command(name, *args)
+
+    def read_responses(self, name: str, *tags: bytes) -> tuple[str, list[Any]]:
+        # Untagged data from every tag is collected before it is handed back, so
+        # pipelined commands of the same kind (e.g. several FETCHes) share one result.
+        # It is drained even when one of them fails, so it cannot leak into the next
+        # command's result; the status is that of the first failure.
+        typ = "OK"
+        for tag in tags:
+            status, _ = self._command_complete(name, tag)
+            if typ == "OK":
+                typ = status
+        return typ, self._untagged_response("OK", [None], name)[1]
+
+
 TRASH_FOLDERS = (
     "Trash",
     "Deleted Items",
@@ -31,13 +63,60 @@ TRASH_FOLDERS = (
     "Bin",
     "[Gmail]/Trash",
 )
+_TRASH_SET = frozenset(folder.lower().encode("utf-8") for folder in TRASH_FOLDERS)
+# Trash folder names already discovered via LIST, keyed by (server, account). An empty name
+# marks an account whose known trash folder could not be selected, so LIST is always sent for it.
+_TRASH_CACHE: dict[tuple[str, str], str] = {}
+# Well-known trash folders, so recognised hosts skip the LIST round-trip entirely.
+_TRASH_BY_HOST = {
+    "imap.gmail.com": "[Gmail]/Trash",
+    "imap.googlemail.com": "[Gmail]/Trash",
+    "outlook.office365.com": "Deleted Items",
+    "imap-mail.outlook.com": "Deleted Items",
+    "imap.mail.me.com": "Deleted Messages",
+    "imap.mail.yahoo.com": "Trash",
+}
+
+# Logged-in connections kept between invocations, keyed by (server, port, account, password
+# digest) so a changed password opens a fresh session without the password itself being kept.
+_POOL: dict[tuple[str, int, str, str], list[tuple[PipelinedIMAP4_SSL, float]]] = {}
+_POOL_LOCK = threading.Lock()
+# Most providers drop idle IMAP sessions after ~30 minutes.
+_POOL_IDLE_TIMEOUT = 25 * 60
+# Large batches are split across up to this many sessions; providers typically allow 10-15.
+_FETCH_CONNECTIONS = 3
+# Messages are fetched, and streamed back, this many at a time.
+_FETCH_BATCH_SIZE = 25
+
+# BytesParser keeps no per-message state, so one instance is shared by every parse.
+# It stays on compat32: policy.default's structured header classes parse several times slower.
+_PARSER = BytesParser()
+
+_LIST_RE = re.compile(
+    rb'\((?P<flags>[^)]*)\) (?:"(?P<delim>[^"]*)"|NIL) (?:"(?P<name>(?:[^"\\]|\\.)*)"|(?P<name2>\S+))'
+)
+_FETCH_ID_RE = re.compile(rb"^(\d+) ")
+_FETCH_TOKEN_RE = re.compile(
+    rb'\s*(?:(?P<open>\()|(?P<close>\))|"(?P<quoted>(?:[^"\\]|\\.)*)"'
+    rb'|\{(?P<literal>\d+)\+?\}|(?P<atom>(?:[^\s()"\[{]|\[[^\]]*\])+))'
+)
+_CONTENT_HEADER_RE = re.compile(
+    rb"^Content-[^:\r\n]*:.*\r?\n(?:[ \t].*\r?\n)*", re.IGNORECASE | re.MULTILINE
+)
 
 
 class FetchImapEmailsTool(Tool):
     def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage]:
         try:
             config = self._build_config(tool_parameters)
-            emails, deleted_count, trash_empty = self._fetch_and_delete_emails(config)
+            stream = self._fetch_and_delete_emails(config)
+            while True:
+                try:
+                    parsed = next(stream)
+                except StopIteration as stop:
+                    deleted_count, trash_empty = stop.value
+                    break
+                yield self.create_json_message({"email": parsed})
             yield self.create_json_message(
                 {
                     "config_name": config.config_name,
@@ -45,7 +124,6 @@ class FetchImapEmailsTool(Tool):
                     "imap_server": config.imap_server,
                     "imap_port": config.imap_port,
                     "recent_count": config.recent_count,
-                    "emails": emails,
                     "deleted_count": deleted_count,
                     "trash_cleared": trash_empty,
                 }
@@ -55,13 +133,12 @@ class FetchImapEmailsTool(Tool):
 
     def _build_config(self, tool_parameters: dict[str, Any]) -> ImapConfig:
         creds = getattr(self.runtime, "credentials", {}) or {}
-        config_name = tool_parameters.get("config_name") or creds.get("config_name")
-        account = tool_parameters.get("email_account") or creds.get("email_account")
-        password = tool_parameters.get("email_password") or creds.get("email_password")
-        server = tool_parameters.get("imap_server") or creds.get("imap_server")
-        port = tool_parameters.get("imap_port") or creds.get("imap_port")
-        recent_count = tool_parameters.get("recent_count") or creds.get("recent_count") or 5
+        return self._make_config(*(tool_parameters.get(name) or creds.get(name) for name in _CONFIG_FIELDS))
 
+    def _make_config(
+        self, config_name: Any, account: Any, password: Any, server: Any, port: Any, recent_count: Any
+    ) -> ImapConfig:
+        recent_count = recent_count or 5
         if not account or "@" not in str(account):
             raise ValueError("Invalid or missing email_account")
         if not password:
@@ -92,35 +169,289 @@ class FetchImapEmailsTool(Tool):
             recent_count=recent_count,
         )
 
-    def _fetch_and_delete_emails(self, config: ImapConfig) -> tuple[list[dict[str, Any]], int, bool]:
-        mail = imaplib.IMAP4_SSL(config.imap_server, config.imap_port)
+    def _fetch_and_delete_emails(self, config: ImapConfig) -> Generator[dict[str, Any], None, tuple[int, bool]]:
+        mail = self._acquire_connection(config)
         deleted_count = 0
-        emails: list[dict[str, Any]] = []
         trash_cleared = False
         try:
-            mail.login(config.email_account, config.email_password)
-            mail.select("INBOX")
-            _, data = mail.search(None, "ALL")
-            mail_ids = data[0].split()
-            target_ids = list(reversed(mail_ids[-config.recent_count :]))
-
-            for mail_id in target_ids:
-                _, msg_data = mail.fetch(mail_id, "(RFC822)")
-                for response_part in msg_data:
-                    if not isinstance(response_part, tuple):
-                        continue
-                    msg = email.message_from_bytes(response_part[1])
-                    emails.append(self._extract_email(msg))
-                mail.store(mail_id, "+FLAGS", "\\Deleted")
-                deleted_count += 1
+            _, data = mail.select("INBOX")
+            # Every untagged EXISTS seen during SELECT is returned in order; the last is current.
+            exists = int(data[-1] or 0)
+            target_ids: list[bytes] = []
+            if exists:
+                # The newest messages are the last sequence numbers, so their UIDs can be read
+                # without searching (and listing) the whole mailbox.
+                _, uid_data = mail.fetch(f"{max(1, exists - config.recent_count + 1)}:{exists}", "(UID)")
+                uids = (items.get(b"UID") for items in self._parse_fetch_data(uid_data).values())
+                target_ids = sorted((uid for uid in uids if isinstance(uid, bytes)), key=int, reverse=True)
+            # LIST does not depend on the selected mailbox, so it rides along with the FETCHes.
+            list_tag = None
+            if self._known_trash_folder(config) is None:
+                list_tag = mail.send_command("LIST", '""', "*")
 
             if target_ids:
+                msg_set = b",".join(target_ids).decode()
+                # Parsing is pure Python, and dify_plugin runs under gevent, so it stays serial.
+                for msg_bytes in self._iter_messages(mail, config, target_ids):
+                    yield self._parse_email(msg_bytes)
+
+                mail.uid("STORE", msg_set, "+FLAGS", "\\Deleted")
                 mail.expunge()
-            trash_cleared = self._empty_trash(mail)
-        finally:
+                deleted_count = len(target_ids)
+
+            mailboxes = mail.read_responses("LIST", list_tag)[1] if list_tag else None
+            trash_cleared = self._empty_trash(mail, config, mailboxes)
+        except BaseException:
+            # Also reached via GeneratorExit when the caller stops early; nothing is deleted then.
+            self._close_connection(mail)
+            raise
+        self._release_connection(config, mail)
+
+        return deleted_count, trash_cleared
+
+    def _pool_key(self, config: ImapConfig) -> tuple[str, int, str, str]:
+        digest = hashlib.sha256(config.email_password.encode("utf-8")).hexdigest()
+        return config.imap_server, config.imap_port, config.email_account, digest
+
+    def _acquire_connection(self, config: ImapConfig) -> PipelinedIMAP4_SSL:
+        while True:
+            with _POOL_LOCK:
+                idle = _POOL.get(self._pool_key(config))
+                pooled = idle.pop() if idle else None
+            if pooled is None:
+                break
+            mail, last_used = pooled
+            if time.monotonic() - last_used < _POOL_IDLE_TIMEOUT:
+                try:
+                    mail.noop()
+                    return mail
+                except (imaplib.IMAP4.error, OSError):
+                    pass
+            self._close_connection(mail)
+
+        mail = PipelinedIMAP4_SSL(config.imap_server, config.imap_port)
+        try:
+            mail.login(config.email_account, config.email_password)
+        except Exception:
+            self._close_connection(mail)
+            raise
+        return mail
+
+    def _release_connection(self, config: ImapConfig, mail: PipelinedIMAP4_SSL) -> None:
+        with _POOL_LOCK:
+            idle = _POOL.setdefault(self._pool_key(config), [])
+            idle.append((mail, time.monotonic()))
+            evicted = idle[:-_FETCH_CONNECTIONS]
+            del idle[:-_FETCH_CONNECTIONS]
+        for replaced, _ in evicted:
+            self._close_connection(replaced)
+
+    def _close_connection(self, mail: imaplib.IMAP4_SSL) -> None:
+        try:
             mail.logout()
+        except Exception:
+            pass
+
+    def _iter_messages(
+        self, mail: PipelinedIMAP4_SSL, config: ImapConfig, target_ids: list[bytes]
+    ) -> Iterator[bytes]:
+        # Messages are fetched in batches and handed out in target_ids order as each batch
+        # arrives, so only a few batches of raw messages are held at any time.
+        batches = [
+            target_ids[index : index + _FETCH_BATCH_SIZE]
+            for index in range(0, len(target_ids), _FETCH_BATCH_SIZE)
+        ]
+        extra_connections = min(_FETCH_CONNECTIONS, len(batches)) - 1
+        if extra_connections < 1:
+            for batch in batches:
+                yield from self._take_in_order(self._fetch_messages(mail, batch), batch)
+            return
+
+        with ThreadPoolExecutor(max_workers=extra_connections) as executor:
+            # The main connection takes the first batch; extra sessions stay busy with the
+            # batches just after the one being handed out.
+            pending: dict[int, Future[dict[bytes, bytes] | None]] = {}
+            for index, batch in enumerate(batches):
+                for ahead in range(index + 1, min(index + 1 + extra_connections, len(batches))):
+                    if ahead not in pending:
+                        pending[ahead] = executor.submit(self._fetch_on_extra_connection, config, batches[ahead])
+                future = pending.pop(index, None)
+                fetched = future.result() if future is not None else None
+                if fetched is None:
+                    fetched = self._fetch_messages(mail, batch)
+                yield from self._take_in_order(fetched, batch)
+
+    def _take_in_order(self, raw_by_id: dict[bytes, bytes], batch: list[bytes]) -> Iterator[bytes]:
+        # Popped so each raw message can be freed once it has been parsed.
+        for mail_id in batch:
+            raw = raw_by_id.pop(mail_id, None)
+            if raw is not None:
+                yield raw
+
+    def _fetch_on_extra_connection(self, config: ImapConfig, batch: list[bytes]) -> dict[bytes, bytes] | None:
+        try:
+            mail = self._acquire_connection(config)
+        except (imaplib.IMAP4.error, OSError):
+            # Usually the provider's per-account session cap; the main connection takes the batch.
+            return None
+        try:
+            if mail.select("INBOX", readonly=True)[0] != "OK":
+                self._close_connection(mail)
+                return None
+            fetched = self._fetch_messages(mail, batch)
+        except (imaplib.IMAP4.error, OSError):
+            self._close_connection(mail)
+            return None
+        except BaseException:
+            self._close_connection(mail)
+            raise
+        self._release_connection(config, mail)
+        return fetched
 
-        return emails, deleted_count, trash_cleared
+    def _fetch_messages(self, mail: PipelinedIMAP4_SSL, target_ids: list[bytes]) -> dict[bytes, bytes]:
+        _, structure_data = mail.uid("FETCH", b",".join(target_ids).decode(), "(BODYSTRUCTURE)")
+        structures = self._parse_fetch_data(structure_data)
+        sections: dict[str, list[bytes]] = {}
+        fallback_ids: list[bytes] = []
+        for mail_id in target_ids:
+            section = self._find_text_section(structures.get(mail_id, {}).get(b"BODYSTRUCTURE"))
+            if section is None:
+                fallback_ids.append(mail_id)
+            else:
+                sections.setdefault(section, []).append(mail_id)
+
+        tags = []
+        for section, mail_ids in sections.items():
+            if section == "TEXT":
+                query = "(BODY.PEEK[HEADER] BODY.PEEK[TEXT])"
+            elif section == "HEADER":
+                query = "(BODY.PEEK[HEADER])"
+            else:
+                query = f"(BODY.PEEK[HEADER] BODY.PEEK[{section}.MIME] BODY.PEEK[{section}])"
+            tags.append(mail.send_command("UID", "FETCH", b",".join(mail_ids).decode(), query))
+
+        raw_by_id: dict[bytes, bytes] = {}
+        if tags:
+            _, msg_data = mail.read_responses("FETCH", *tags)
+            items_by_id = self._parse_fetch_data(msg_data)
+            for section, mail_ids in sections.items():
+                for mail_id in mail_ids:
+                    raw = self._assemble_message(items_by_id.get(mail_id, {}), section)
+                    if raw is None:
+                        fallback_ids.append(mail_id)
+                    else:
+                        raw_by_id[mail_id] = raw
+
+        if fallback_ids:
+            _, msg_data = mail.uid("FETCH", b",".join(fallback_ids).decode(), "(BODY.PEEK[])")
+            for mail_id, items in self._parse_fetch_data(msg_data).items():
+                raw = items.get(b"BODY[]")
+                if isinstance(raw, bytes):
+                    raw_by_id[mail_id] = raw
+        return raw_by_id
+
+    def _parse_fetch_data(self, msg_data: list[Any]) -> dict[bytes, dict[bytes, Any]]:
+        # imaplib returns each FETCH response as zero or more (text, literal) tuples followed by
+        # the closing text, e.g. [(b'1 (UID 7 BODY[HEADER] {342}', hdr), (b' BODY[1] {9}', body), b')'].
+        responses: dict[bytes, dict[bytes, Any]] = {}
+        index, count = 0, len(msg_data)
+        while index < count:
+            end = index
+            while end < count and isinstance(msg_data[end], tuple):
+                end += 1
+            chunks = [chunk for response_part in msg_data[index:end] for chunk in response_part]
+            if end < count and msg_data[end] is not None:
+                chunks.append(msg_data[end])
+            index = end + 1
+            match = _FETCH_ID_RE.match(chunks[0]) if chunks else None
+            if match is None:
+                continue
+            chunks[0] = chunks[0][match.end() :]
+            parsed = self._parse_imap_data(chunks)
+            if not parsed or not isinstance(parsed[0], list):
+                continue
+            attributes = parsed[0]
+            items = {
+                name.upper(): value
+                for name, value in zip(attributes[::2], attributes[1::2])
+                if isinstance(name, bytes)
+            }
+            # UID FETCH responses are keyed by UID; anything else by sequence number.
+            mail_id = items.get(b"UID")
+            responses.setdefault(mail_id if isinstance(mail_id, bytes) else match.group(1), {}).update(items)
+        return responses
+
+    def _parse_imap_data(self, chunks: list[bytes]) -> list[Any]:
+        # imaplib hands literals back as separate chunks: text, literal, text, ...
+        stack: list[list[Any]] = [[]]
+        for index, chunk in enumerate(chunks):
+            if index % 2:
+                stack[-1].append(chunk)
+                continue
+            for match in _FETCH_TOKEN_RE.finditer(chunk):
+                if match.group("open"):
+                    stack[-1].append([])
+                    stack.append(stack[-1][-1])
+                elif match.group("close"):
+                    if len(stack) > 1:
+                        stack.pop()
+                elif match.group("quoted") is not None:
+                    stack[-1].append(re.sub(rb"\\(.)", rb"\1", match.group("quoted")))
+                elif match.group("atom"):
+                    atom = match.group("atom")
+                    stack[-1].append(None if atom.upper() == b"NIL" else atom)
+        return stack[0]
+
+    def _find_text_section(self, structure: Any) -> str | None:
+        # Mirrors _extract_body: the first inline text/plain leaf in walk order, else the first
+        # text/html; "HEADER" when the message has no inline text part at all.
+        if not isinstance(structure, list) or not structure:
+            return None
+        if not isinstance(structure[0], list):
+            return "TEXT"
+        html_section = None
+        for section, part in self._iter_leaf_sections(structure, ""):
+            if len(part) < 2 or not isinstance(part[0], bytes) or not isinstance(part[1], bytes):
+                return None
+            content_type = part[0].lower(), part[1].lower()
+            if content_type == (b"message", b"rfc822"):
+                return None
+            if content_type[0] != b"text" or (len(part) > 9 and part[9] is not None):
+                continue
+            if content_type[1] == b"plain":
+                return section
+            if content_type[1] == b"html" and html_section is None:
+                html_section = section
+        return html_section or "HEADER"
+
+    def _iter_leaf_sections(self, structure: list[Any], prefix: str) -> Iterator[tuple[str, list[Any]]]:
+        for index, part in enumerate(structure, start=1):
+            if not isinstance(part, list) or not part:
+                break
+            section = f"{prefix}{index}"
+            if isinstance(part[0], list):
+                yield from self._iter_leaf_sections(part, f"{section}.")
+            else:
+                yield section, part
+
+    def _assemble_message(self, items: dict[bytes, Any], section: str) -> bytes | None:
+        header = items.get(b"BODY[HEADER]")
+        if section == "TEXT":
+            parts = [header, items.get(b"BODY[TEXT]")]
+        else:
+            # Swap the top-level Content-* headers for those of the selected part.
+            if isinstance(header, bytes):
+                header = _CONTENT_HEADER_RE.sub(b"", header).rstrip(b"\r\n") + b"\r\n"
+            if section == "HEADER":
+                parts = [header, b"\r\n"]
+            else:
+                parts = [header, items.get(f"BODY[{section}.MIME]".encode()), items.get(f"BODY[{section}]".encode())]
+        if not all(isinstance(part, bytes) for part in parts):
+            return None
+        return b"".join(parts)
+
+    def _parse_email(self, raw: bytes) -> dict[str, Any]:
+        return self._extract_email(_PARSER.parsebytes(raw))
 
     def _extract_email(self, msg: email.message.Message) -> dict[str, Any]:
         subject = self._decode_header_value(msg.get("Subject"))
@@ -129,62 +460,113 @@ class FetchImapEmailsTool(Tool):
         body = self._extract_body(msg)
         return {"subject": subject, "from": from_, "date": date_, "body": body}
 
-    def _decode_header_value(self, value: str | None) -> str:
+    def _decode_header_value(self, value: str | Header | None) -> str:
+        # compat32 hands raw 8-bit headers back as Header objects; decode_header accepts both.
         if not value:
             return ""
-        decoded = decode_header(value)
-        return str(make_header(decoded))
+        if isinstance(value, str) and value.isascii() and "=?" not in value:
+            return value
+        return "".join(self._decode_header_chunk(chunk, charset) for chunk, charset in decode_header(value))
+
+    def _decode_header_chunk(self, chunk: bytes | str, charset: str | None) -> str:
+        if isinstance(chunk, str):
+            # Undecodable bytes may arrive surrogate-escaped, which JSON encoding rejects.
+            return chunk.encode("utf-8", "surrogateescape").decode("utf-8", "replace")
+        try:
+            return chunk.decode(charset or "utf-8", "ignore")
+        except LookupError:
+            return chunk.decode("utf-8", "ignore")
 
     def _extract_body(self, msg: email.message.Message) -> str:
         if msg.is_multipart():
+            plain, html = None, None
             for part in msg.walk():
-                if part.get_content_type() == "text/plain" and part.get("Content-Disposition") is None:
-                    return self._decode_part(part)
-            for part in msg.walk():
-                if part.get_content_type() == "text/html" and part.get("Content-Disposition") is None:
-                    return self._decode_part(part)
-            return ""
+                if part.get("Content-Disposition") is not None:
+                    continue
+                content_type = part.get_content_type()
+                if content_type == "text/plain":
+                    plain = part
+                    break
+                if content_type == "text/html" and html is None:
+                    html = part
+            chosen = plain if plain is not None else html
+            return self._decode_part(chosen) if chosen is not None else ""
         return self._decode_part(msg)
 
     def _decode_part(self, part: email.message.Message) -> str:
-        charset = part.get_content_charset() or "utf-8"
         payload = part.get_payload(decode=True)
         if payload is None:
             return ""
-        return payload.decode(charset, errors="ignore")
-
-    def _empty_trash(self, mail: imaplib.IMAP4_SSL) -> bool:
-        mailboxes = mail.list()[1]
-        trash_folder = self._find_trash_folder(mailboxes)
-        if not trash_folder:
-            return False
-        mail.select(trash_folder)
+        return self._lookup_codec(part.get_content_charset() or "utf-8").decode(payload, "ignore")[0]
+
+    # Keyed by the charset name as it appears in the MIME header, which comes from untrusted
+    # mail, so the cache is bounded.
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def _lookup_codec(charset: str) -> codecs.CodecInfo:
+        # Python's own codec comes first: Charset maps some names to narrower codecs
+        # (cp949 -> ks_c_5601-1987 -> euc_kr) and the extra characters would be dropped.
+        names = [charset]
+        try:
+            names.append(email.charset.Charset(charset).input_codec)
+        except (ValueError, email.errors.MessageError):
+            pass
+        for name in names:
+            try:
+                codec = codecs.lookup(name)
+            except (LookupError, TypeError, ValueError):
+                continue
+            # Skip bytes-to-bytes codecs such as "base64" or "zlib", as bytes.decode does.
+            if getattr(codec, "_is_text_encoding", True):
+                return codec
+        return codecs.lookup("utf-8")
+
+    def _empty_trash(
+        self, mail: PipelinedIMAP4_SSL, config: ImapConfig, mailboxes: list[Any] | None = None
+    ) -> bool:
+        cache_key = (config.imap_server, config.email_account)
+        trash_folder = self._known_trash_folder(config)
+        if trash_folder is not None and mail.select(self._quote_mailbox(trash_folder))[0] != "OK":
+            # Stale cache entry, or a host default this account does not use (e.g. a localised
+            # Gmail trash); later invocations pipeline LIST instead of repeating this SELECT.
+            _TRASH_CACHE[cache_key] = ""
+            trash_folder = None
+        if trash_folder is None:
+            if mailboxes is None:
+                mailboxes = mail.list()[1]
+            trash_folder = self._find_trash_folder(mailboxes)
+            if not trash_folder or mail.select(self._quote_mailbox(trash_folder))[0] != "OK":
+                return False
+        _TRASH_CACHE[cache_key] = trash_folder
         mail.store("1:*", "+FLAGS", "\\Deleted")
         mail.expunge()
         return True
 
-    def _find_trash_folder(self, mailboxes: Iterable[bytes] | None) -> str | None:
+    def _known_trash_folder(self, config: ImapConfig) -> str | None:
+        cached = _TRASH_CACHE.get((config.imap_server, config.email_account))
+        if cached is not None:
+            return cached or None
+        return _TRASH_BY_HOST.get(config.imap_server.lower())
+
+    def _quote_mailbox(self, name: str) -> str:
+        # imaplib sends mailbox arguments verbatim; names such as "Deleted Items" need quoting.
+        return '"' + name.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+    def _find_trash_folder(self, mailboxes: Iterable[bytes | tuple[bytes, bytes]] | None) -> str | None:
         if not mailboxes:
             return None
         for line in mailboxes:
-            try:
-                mailbox = line.decode("utf-8", errors="ignore")
-            except Exception:
-                continue
-            mailbox_name = self._parse_mailbox_name(mailbox)
-            if not mailbox_name:
-                continue
-            for folder in TRASH_FOLDERS:
-                if mailbox_name.lower() == folder.lower():
-                    return mailbox_name
-        return None
-
-    def _parse_mailbox_name(self, mailbox_line: str) -> str | None:
-        if "\"" in mailbox_line:
-            parts = mailbox_line.split("\"")
-            if len(parts) >= 2:
-                return parts[-2]
-        tokens = mailbox_line.split()
-        if tokens:
-            return tokens[-1].strip("\"")
+            if isinstance(line, tuple):
+                # Mailbox name sent as a literal: (b'(\\Flags) "/" {5}', b'Trash')
+                mailbox_name = line[1]
+            else:
+                match = _LIST_RE.match(line) if isinstance(line, bytes) else None
+                if match is None:
+                    continue
+                if match.group("name") is not None:
+                    mailbox_name = re.sub(rb"\\(.)", rb"\1", match.group("name"))
+                else:
+                    mailbox_name = match.group("name2")
+            if mailbox_name.lower() in _TRASH_SET:
+                return mailbox_name.decode("utf-8", errors="ignore")
         return None